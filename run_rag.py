@@ -1,12 +1,63 @@
+import argparse
 import readline
 from dotenv import load_dotenv
 load_dotenv()
 
-from src.generator import RAGEngine
+from src.config import BATCH_CONCURRENCY, BATCH_RATE_LIMIT_RPM, BATCH_PDF_WORKERS
+
+# src.generator / src.batch (torch, sentence-transformers, faiss) are imported
+# inside the functions below: batch mode's PDF worker processes re-import this
+# module, and they only need src.pdf_generator.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local RAG + LaTeX/PDF generation")
+    parser.add_argument("--batch", metavar="JOBS_JSONL",
+                        help="run every query in this JSONL file instead of the interactive shell")
+    parser.add_argument("--out", metavar="RESULTS_JSONL", default="batch_results.jsonl",
+                        help="where batch results + per-item timings are written")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="max LLM calls in flight at once")
+    parser.add_argument("--rpm", type=float, default=BATCH_RATE_LIMIT_RPM,
+                        help="max LLM requests per minute (0 = unlimited)")
+    parser.add_argument("--pdf-workers", type=int, default=BATCH_PDF_WORKERS,
+                        help="parallel latexmk processes")
+    parser.add_argument("--base-url", default=None,
+                        help="OpenAI-compatible endpoint, e.g. a local stub server")
+    return parser.parse_args()
+
+
+def run_batch_mode(args):
+    from src.batch import load_jobs, run_batch, write_results
+    from src.generator import RAGEngine
+
+    jobs = load_jobs(args.batch)
+    print(f"Initializing RAG engine for {len(jobs)} batch jobs...")
+    rag = RAGEngine(base_url=args.base_url)
+
+    results = run_batch(
+        rag,
+        jobs,
+        concurrency=args.concurrency,
+        rate_limit_rpm=args.rpm,
+        pdf_workers=args.pdf_workers,
+    )
+    write_results(args.out, results)
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"Wrote {len(results)} results to {args.out} ({failed} failed)")
+
 
 def main():
+    args = parse_args()
+    if args.batch:
+        run_batch_mode(args)
+        return
+
+    from src.generator import RAGEngine
+
     print("Initializing RAG engine (index + embeddings + OpenAI client)...")
-    rag = RAGEngine()
+    rag = RAGEngine(base_url=args.base_url)
 
     print("\nType your question below. Type 'quit' to exit.\n")
 
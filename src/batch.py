@@ -0,0 +1,262 @@
+"""
+Concurrent batch generation: many queries in, one JSONL result per query out.
+
+Input JSONL, one job per line:
+    {"query": "make a cis320 DP pset", "mode": "cis320_pset", "output_name": "dp_pset"}
+("mode" defaults to "auto", "k" to 5, "output_name" to batch_<line>.)
+
+Pipeline:
+  1. all queries are embedded and searched in one batched retrieval,
+  2. LLM calls run on a thread pool, capped by concurrency and a
+     requests-per-minute limiter,
+  3. PDF jobs are handed to a process pool (latexmk) as soon as their LLM
+     call returns, each writing its own output_name.
+
+Usage:
+    python3 run_rag.py --batch jobs.jsonl --out results.jsonl
+"""
+
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from .config import BATCH_CONCURRENCY, BATCH_RATE_LIMIT_RPM, BATCH_PDF_WORKERS
+from .generator import is_pdf_mode
+from .pdf_generator import compile_pdf_job
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than `rpm` start per minute (0 = unlimited)."""
+
+    def __init__(self, rpm: float):
+        self._interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until the next slot; returns seconds waited."""
+        if self._interval == 0.0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# ---------- Job I/O ----------
+
+def load_jobs(path: Path) -> List[Dict[str, Any]]:
+    jobs = []
+    for lineno, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        raw = json.loads(line)
+        if not raw.get("query"):
+            raise ValueError(f"{path}:{lineno}: job has no 'query'")
+
+        jobs.append(
+            {
+                "line": lineno,
+                "query": raw["query"],
+                "mode": raw.get("mode", "auto"),
+                "k": int(raw.get("k", 5)),
+                "output_name": raw.get("output_name") or f"batch_{lineno}",
+            }
+        )
+
+    # Parallel PDF builds must not clobber each other's output/<name>.tex
+    seen = {}
+    for job in jobs:
+        if not is_pdf_mode(job["mode"]):
+            continue
+        name = job["output_name"]
+        if name in seen:
+            raise ValueError(
+                f"{path}: lines {seen[name]} and {job['line']} share output_name '{name}'"
+            )
+        seen[name] = job["line"]
+
+    return jobs
+
+
+def write_results(path: Path, results: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for res in results:
+            f.write(json.dumps(res, ensure_ascii=False) + "\n")
+
+
+# ---------- Workers ----------
+
+def _llm_job(rag, limiter: RateLimiter, job, req, result):
+    hit = rag.cached_answer(req, job["output_name"])
+    if hit is not None:
+        result["cached"] = True
+        result["answer"], pdf_path = hit
+        if pdf_path is not None:
+            result["pdf_path"] = str(pdf_path)
+        return None
+
+    result["timings"]["rate_wait_s"] = round(limiter.acquire(), 4)
+    start = time.perf_counter()
+    out = rag.complete_request(req)
+    result["timings"]["llm_s"] = round(time.perf_counter() - start, 4)
+
+    if is_pdf_mode(job["mode"]):
+        return out   # compiled by the caller on the process pool
+
+    result["answer"], _ = rag.finish(req, out, job["output_name"])
+    return None
+
+
+def _pdf_pool_context():
+    # By now the LLM threads, the Retriever watcher and torch's threads are
+    # running; forking a multi-threaded process can deadlock, so start the
+    # latexmk workers from a clean interpreter instead. Workers only need
+    # src.pdf_generator (plus __main__, which multiprocessing always
+    # re-imports; run_rag.py keeps its heavy imports inside functions so
+    # that stays cheap). The spawn fallback pays that import per worker.
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" not in methods:
+        return multiprocessing.get_context("spawn")
+
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["__main__", "src.pdf_generator"])
+    return ctx
+
+
+# ---------- Driver ----------
+
+def run_batch(
+    rag,
+    jobs: List[Dict[str, Any]],
+    concurrency: int = BATCH_CONCURRENCY,
+    rate_limit_rpm: float = BATCH_RATE_LIMIT_RPM,
+    pdf_workers: int = BATCH_PDF_WORKERS,
+    compile_fn: Callable[[str, str], Tuple[str, float]] = compile_pdf_job,
+) -> List[Dict[str, Any]]:
+    """
+    Run every job through retrieve -> LLM -> (PDF) with the given limits.
+    Returns one result dict per job, in input order. A failing job is
+    recorded with status="error" and does not stop the batch.
+
+    compile_fn runs in the PDF process pool, so it must be a picklable
+    top-level function with compile_pdf_job's signature.
+    """
+    batch_start = time.perf_counter()
+    results = [
+        {
+            "line": job["line"],
+            "query": job["query"],
+            "mode": job["mode"],
+            "output_name": job["output_name"],
+            "status": "ok",
+            "cached": False,
+            "answer": None,
+            "pdf_path": None,
+            "error": None,
+            "timings": {},
+        }
+        for job in jobs
+    ]
+    if not jobs:
+        return results
+
+    # 1) Batched retrieval: one encode + one FAISS search at the largest k.
+    # Flat-index results are exact, so the top-k prefix is each job's answer.
+    start = time.perf_counter()
+    queries = [job["query"] for job in jobs]
+    query_embs = rag.retriever.embed_batch(queries)
+    max_k = max(job["k"] for job in jobs)
+    all_chunks = rag.retriever.retrieve_batch(queries, k=max_k, query_embs=query_embs)
+    reqs = [
+        rag.prepare(job["query"], mode=job["mode"], k=job["k"],
+                    query_emb=query_embs[i], chunks=all_chunks[i][:job["k"]])
+        for i, job in enumerate(jobs)
+    ]
+    retrieve_s = round(time.perf_counter() - start, 4)
+    print(f"Retrieved context for {len(jobs)} queries in {retrieve_s}s")
+
+    limiter = RateLimiter(rate_limit_rpm)
+    item_start = {}
+
+    done_count = 0
+
+    def finish(i, error=None):
+        nonlocal done_count
+        res = results[i]
+        if error is not None:
+            res["status"] = "error"
+            res["error"] = f"{type(error).__name__}: {error}"
+        res["timings"]["retrieve_batch_s"] = retrieve_s
+        res["timings"]["total_s"] = round(time.perf_counter() - item_start[i], 4)
+        done_count += 1
+        print(f"[{done_count}/{len(jobs)} done] line {res['line']} {res['status']}: "
+              f"{res['query'][:60]}")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as llm_pool, \
+            ProcessPoolExecutor(max_workers=max(1, pdf_workers),
+                                mp_context=_pdf_pool_context()) as pdf_pool:
+
+        # 2) LLM calls
+        pending = {}   # future -> ("llm" | "pdf", job index)
+        for i, job in enumerate(jobs):
+            item_start[i] = time.perf_counter()
+            fut = llm_pool.submit(_llm_job, rag, limiter, job, reqs[i], results[i])
+            pending[fut] = ("llm", i)
+
+        # 3) One loop over both pools, so a PDF job finishes (and is timed)
+        # as soon as its own compile does, not after the slowest LLM call.
+        pdf_latex = {}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, i = pending.pop(fut)
+                res = results[i]
+
+                if kind == "llm":
+                    try:
+                        latex = fut.result()
+                    except Exception as e:
+                        finish(i, e)
+                        continue
+
+                    if latex is None:
+                        finish(i)
+                        continue
+
+                    # PDF builds start as soon as their LaTeX arrives
+                    pdf_latex[i] = latex
+                    pdf_fut = pdf_pool.submit(compile_fn, latex, jobs[i]["output_name"])
+                    pending[pdf_fut] = ("pdf", i)
+                    continue
+
+                try:
+                    pdf_path, pdf_s = fut.result()
+                    res["answer"], _ = rag.finish(
+                        reqs[i], pdf_latex.pop(i), jobs[i]["output_name"], pdf_path=pdf_path
+                    )
+                except Exception as e:
+                    finish(i, e)
+                    continue
+
+                res["pdf_path"] = str(pdf_path)
+                res["timings"]["pdf_s"] = round(pdf_s, 4)
+                finish(i)
+
+    print(f"Batch finished in {time.perf_counter() - batch_start:.2f}s")
+    return results
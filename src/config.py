@@ -11,6 +11,10 @@ INDEX_DIR = BASE_DIR / "index"
 INDEX_PATH = INDEX_DIR / "rag.index"
 METADATA_PATH = INDEX_DIR / "metadata.json"
 
+# Versioned index generations (see src/index_store.py)
+GENERATIONS_DIR = INDEX_DIR / "generations"
+CURRENT_POINTER_PATH = INDEX_DIR / "CURRENT"
+
 PROFILE_PATH = PROFILE_DIR / "user_profile.txt"
 
 # Make sure index dir exists
@@ -24,6 +28,41 @@ EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 # You can switch this to "gpt-4.1" / "gpt-4.1-mini" / "o3-mini" etc.
 DEFAULT_MODEL_NAME = "gpt-4.1-mini"
 
+# === Hot reload ===
+# How often (seconds) a Retriever checks index/CURRENT for a new generation.
+# Set to 0 to disable the background watcher.
+INDEX_RELOAD_INTERVAL = 5.0
+
+# === Semantic answer cache ===
+# Paraphrased queries that retrieve the same chunks reuse the stored answer / PDF.
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_CAPACITY = 256   # entries; least-recently-used evicted first
+
+# Minimum cosine similarity between query embeddings, per generate() mode.
+# Numbers in the query ("week 3" vs "week 4") must also match exactly, and
+# so must the retrieved chunk set, so the threshold only has to absorb wording.
+# - cis320_pset / stat431_cheatsheet: fixed course + template, the output is
+#   driven by the prompt style and chunks; paraphrases there vary most in
+#   wording ("DP pset" vs "dynamic programming problems"), so a bit looser.
+# - pdf / latex: generic modes whose content is whatever the question asks
+#   for, so a near miss is a different document; stricter.
+# - auto / default: free-text answers, cheap to regenerate.
+# These are starting points, not measured values: lower a mode's value if
+# obvious paraphrases miss, raise it if it serves wrong answers.
+SEMANTIC_CACHE_THRESHOLDS = {
+    "default": 0.92,
+    "auto": 0.92,
+    "latex": 0.94,
+    "pdf": 0.94,
+    "cis320_pset": 0.90,
+    "stat431_cheatsheet": 0.90,
+}
+
+# === Batch generation (run_rag.py --batch) ===
+BATCH_CONCURRENCY = 4       # LLM calls in flight at once
+BATCH_RATE_LIMIT_RPM = 60   # LLM requests per minute; 0 disables the limiter
+BATCH_PDF_WORKERS = 2       # latexmk processes running in parallel
+
 # === Chunking parameters ===
 CHUNK_SIZE = 700       # characters
 CHUNK_OVERLAP = 150    # characters
@@ -2,37 +2,42 @@ import os
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from .config import SEMANTIC_CACHE_ENABLED
 from .retriever import Retriever
-from .prompt_builder import build_prompt
-from .pdf_generator import compile_pdf
+from .prompt_builder import build_prompt, resolve_style
+from .pdf_generator import compile_pdf, copy_pdf
+from .semantic_cache import SemanticCache
+
+
+PDF_MODES = ("pdf", "cis320_pset", "stat431_cheatsheet")
+
+
+def is_pdf_mode(mode):
+    return mode in PDF_MODES
 
 
 class RAGEngine:
-    def __init__(self):
+    def __init__(self, use_cache=SEMANTIC_CACHE_ENABLED, base_url=None):
         # Load environment
         load_dotenv()
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in .env")
 
-        # OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # OpenAI client (base_url / OPENAI_BASE_URL point it at any
+        # OpenAI-compatible server, e.g. src/stub_llm_server.py)
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+        )
 
         # Retriever
         self.retriever = Retriever()
 
-    def generate(self, query, mode="auto", k=5, output_name="rag_output"):
-        """
-        mode = auto | latex | pdf | cis320_pset | stat431_cheatsheet
-        """
+        # Semantic cache for paraphrased queries
+        self.cache = SemanticCache() if use_cache else None
 
-        # 1. Retrieve chunks
-        chunks = self.retriever.retrieve(query, k=k)
-
-        # 2. Build prompt
-        system_prompt, user_prompt = build_prompt(query, chunks, mode=mode)
-
-        # 3. LLM call
+    def complete(self, system_prompt, user_prompt):
         response = self.client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
@@ -41,11 +46,83 @@ class RAGEngine:
             ],
             temperature=0.1,
         )
-        out = response.choices[0].message.content
+        return response.choices[0].message.content
+
+    def generate(self, query, mode="auto", k=5, output_name="rag_output"):
+        """
+        mode = auto | latex | pdf | cis320_pset | stat431_cheatsheet
+        """
+
+        # 1. Retrieve chunks
+        req = self.prepare(query, mode=mode, k=k)
+
+        # 2. Semantic cache
+        hit = self.cached_answer(req, output_name)
+        if hit is not None:
+            return hit[0]
+
+        # 3. Prompt + LLM call
+        out = self.complete_request(req)
+
+        # 4. PDF mode + cache store
+        answer, _ = self.finish(req, out, output_name)
+        return answer
+
+    # ---------- Pipeline steps (shared with src/batch.py) ----------
+
+    def prepare(self, query, mode="auto", k=5, query_emb=None, chunks=None):
+        """
+        Retrieve context for one query. Batch callers pass query_emb / chunks
+        from a batched retrieval; the embedding is also the cache key.
+        """
+        if query_emb is None:
+            query_emb = self.retriever.embed(query)
+        if chunks is None:
+            chunks = self.retriever.retrieve(query, k=k, query_emb=query_emb)
+
+        return {
+            "query": query,
+            "mode": mode,
+            "query_emb": query_emb,
+            "chunks": chunks,
+            "style": resolve_style(query, chunks, mode=mode),
+        }
+
+    def cached_answer(self, req, output_name):
+        """(answer, pdf_path) for a near-duplicate cached query, or None."""
+        if self.cache is None:
+            return None
+
+        cached = self.cache.lookup_entry(
+            req["query"], req["query_emb"], req["mode"], req["style"], req["chunks"]
+        )
+        if cached is None:
+            return None
+        if cached["pdf_path"] is None:
+            return cached["answer"], None
 
-        # 4. PDF mode
-        if mode in ("pdf", "cis320_pset", "stat431_cheatsheet"):
-            pdf_path = compile_pdf(out, output_name)
-            return f"PDF generated: {pdf_path}"
+        # The caller asked for output/<output_name>.pdf; make sure it exists
+        pdf_path = copy_pdf(cached["pdf_path"], output_name)
+        return f"PDF generated: {pdf_path}", pdf_path
+
+    def complete_request(self, req):
+        system_prompt, user_prompt = build_prompt(req["query"], req["chunks"], mode=req["mode"])
+        return self.complete(system_prompt, user_prompt)
+
+    def finish(self, req, out, output_name, pdf_path=None):
+        """
+        Compile the PDF for PDF modes (unless the caller already built it at
+        pdf_path) and store the result in the cache. Returns (answer, pdf_path).
+        """
+        answer = out
+        if is_pdf_mode(req["mode"]):
+            if pdf_path is None:
+                pdf_path = compile_pdf(out, output_name)
+            answer = f"PDF generated: {pdf_path}"
 
-        return out
+        if self.cache is not None:
+            self.cache.store(
+                req["query"], req["query_emb"], req["mode"], req["style"], req["chunks"],
+                answer, pdf_path=pdf_path,
+            )
+        return answer, pdf_path
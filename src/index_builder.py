@@ -5,7 +5,6 @@ Usage:
     python3 -m src.index_builder
 """
 
-import json
 import re
 from pathlib import Path
 from typing import List, Dict, Any
@@ -16,12 +15,11 @@ from sentence_transformers import SentenceTransformer
 
 from .config import (
     DOCS_DIR,
-    INDEX_PATH,
-    METADATA_PATH,
     EMBED_MODEL_NAME,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
 )
+from .index_store import publish_generation, generation_paths, prune_generations
 
 
 # ---------- Helpers: LaTeX parsing / cleaning ----------
@@ -249,17 +247,19 @@ def build_index() -> None:
     index = faiss.IndexFlatL2(dim)
     index.add(embeddings)
 
-    # 4) Save index + metadata
-    print("Saving index & metadata...")
-    faiss.write_index(index, str(INDEX_PATH))
-    METADATA_PATH.write_text(
-        json.dumps(all_chunks, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    # 4) Publish as a new generation (atomic; running Retrievers hot-reload it)
+    print("Publishing index & metadata...")
+    gen_dir = publish_generation(index, all_chunks)
+    index_path, metadata_path = generation_paths(gen_dir)
+
+    removed = prune_generations()
+    if removed:
+        print(f"Pruned {len(removed)} old generation(s) with no readers.")
 
     print("✔️ Index built successfully!")
-    print(f"  Index:    {INDEX_PATH}")
-    print(f"  Metadata: {METADATA_PATH}")
+    print(f"  Generation: {gen_dir.name}")
+    print(f"  Index:      {index_path}")
+    print(f"  Metadata:   {metadata_path}")
 
 
 if __name__ == "__main__":
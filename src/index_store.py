@@ -0,0 +1,217 @@
+"""
+Versioned, atomically published index generations.
+
+Layout under index/:
+
+    generations/<gen_id>/rag.index
+    generations/<gen_id>/metadata.json
+    generations/<gen_id>/.readers/<lease files>
+    CURRENT                      -> text file holding the live <gen_id>
+
+A new generation is written into a hidden temp directory, renamed into
+place, and only then is CURRENT swapped (write-to-temp + os.replace).
+Readers therefore see either the old generation or the new one, never a
+half-written index. Readers hold a lease file while they use a generation
+so that pruning never deletes an index someone still has open.
+
+Lease files are named after the reader's PID, and a lease whose process is
+gone is treated as stale. That check only means something for readers on
+the same host / PID namespace; don't share index/ between machines or
+containers with separate PID namespaces.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    INDEX_DIR,
+    INDEX_PATH,
+    METADATA_PATH,
+    GENERATIONS_DIR,
+    CURRENT_POINTER_PATH,
+)
+
+INDEX_FILENAME = INDEX_PATH.name
+METADATA_FILENAME = METADATA_PATH.name
+READERS_DIRNAME = ".readers"
+TMP_PREFIX = ".tmp-"
+
+
+# ---------- Publishing ----------
+
+def new_generation_id() -> str:
+    # Sortable by creation time; pid + random suffix keeps concurrent builds apart
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def publish_generation(index: Any, chunks: List[Dict[str, Any]]) -> Path:
+    """
+    Write index + metadata into a temp directory, rename it into
+    generations/, then atomically point CURRENT at it.
+    Returns the published generation directory.
+    """
+    import faiss
+
+    GENERATIONS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=TMP_PREFIX, dir=GENERATIONS_DIR))
+
+    try:
+        faiss.write_index(index, str(tmp_dir / INDEX_FILENAME))
+        (tmp_dir / METADATA_FILENAME).write_text(
+            json.dumps(chunks, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        _fsync_dir(tmp_dir)
+
+        gen_dir = GENERATIONS_DIR / new_generation_id()
+        os.rename(tmp_dir, gen_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _write_current(gen_dir.name)
+    return gen_dir
+
+
+def _write_current(gen_id: str) -> None:
+    tmp_pointer = CURRENT_POINTER_PATH.with_name(
+        f"{CURRENT_POINTER_PATH.name}.{os.getpid()}.tmp"
+    )
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(gen_id + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, CURRENT_POINTER_PATH)
+    _fsync_dir(INDEX_DIR)
+
+
+def _fsync_dir(path: Path) -> None:
+    # Directory fsync is not supported everywhere (e.g. Windows); best effort
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# ---------- Resolving ----------
+
+def current_generation() -> Optional[Path]:
+    """
+    Directory of the live generation, or None if nothing has been
+    published yet (legacy flat index/rag.index layout).
+    """
+    try:
+        gen_id = CURRENT_POINTER_PATH.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    if not gen_id:
+        return None
+
+    gen_dir = GENERATIONS_DIR / gen_id
+    if not (gen_dir / INDEX_FILENAME).exists():
+        return None
+    return gen_dir
+
+
+def generation_paths(gen_dir: Optional[Path]):
+    """(index_path, metadata_path) for a generation, or the legacy flat files."""
+    if gen_dir is None:
+        return INDEX_PATH, METADATA_PATH
+    return gen_dir / INDEX_FILENAME, gen_dir / METADATA_FILENAME
+
+
+# ---------- Reader leases ----------
+
+def acquire_lease(gen_dir: Optional[Path]) -> Optional[Path]:
+    if gen_dir is None:
+        return None
+    readers = gen_dir / READERS_DIRNAME
+    readers.mkdir(exist_ok=True)
+    lease = readers / f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    lease.touch()
+    return lease
+
+
+def release_lease(lease: Optional[Path]) -> None:
+    if lease is None:
+        return
+    try:
+        lease.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    # On Windows os.kill(pid, 0) is not a probe: it calls TerminateProcess.
+    # Without a safe check there, every lease counts as live.
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _has_live_readers(gen_dir: Path) -> bool:
+    readers = gen_dir / READERS_DIRNAME
+    if not readers.is_dir():
+        return False
+
+    for lease in readers.iterdir():
+        pid_str = lease.name.split("-", 1)[0]
+        # Leases left behind by crashed processes are stale; drop them
+        if pid_str.isdigit() and not _pid_alive(int(pid_str)):
+            release_lease(lease)
+            continue
+        return True
+    return False
+
+
+# ---------- Cleanup ----------
+
+def prune_generations() -> List[Path]:
+    """
+    Delete every generation that is neither CURRENT nor held by a live
+    reader. Also removes abandoned temp directories from crashed builds.
+    Returns the removed directories.
+    """
+    if not GENERATIONS_DIR.is_dir():
+        return []
+
+    current = current_generation()
+    removed: List[Path] = []
+
+    for gen_dir in sorted(GENERATIONS_DIR.iterdir()):
+        if not gen_dir.is_dir():
+            continue
+        if current is not None and gen_dir.name == current.name:
+            continue
+        if gen_dir.name.startswith(TMP_PREFIX):
+            # A build may still be writing here; only reap ones left for an hour
+            if time.time() - gen_dir.stat().st_mtime < 3600:
+                continue
+        elif _has_live_readers(gen_dir):
+            continue
+
+        shutil.rmtree(gen_dir, ignore_errors=True)
+        removed.append(gen_dir)
+
+    return removed
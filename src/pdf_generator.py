@@ -1,4 +1,6 @@
+import shutil
 import subprocess
+import time
 from pathlib import Path
 import re
 
@@ -9,15 +11,21 @@ def clean_latex(latex: str) -> str:
     latex = latex.replace("\r", "")
     return latex.strip()
 
+OUTPUT_DIR = Path("output")
+
+
+def pdf_output_path(output_name: str) -> Path:
+    return OUTPUT_DIR / f"{output_name}.pdf"
+
 
 def compile_pdf(latex_code: str, output_name: str = "rag_output"):
     latex_code = clean_latex(latex_code)
 
-    outdir = Path("output")
+    outdir = OUTPUT_DIR
     outdir.mkdir(exist_ok=True)
 
-    tex_path = outdir / f"{output_name}.tex"
-    pdf_path = outdir / f"{output_name}.pdf"
+    pdf_path = pdf_output_path(output_name)
+    tex_path = pdf_path.with_suffix(".tex")
 
     tex_path.write_text(latex_code, encoding="utf-8")
 
@@ -33,3 +41,24 @@ def compile_pdf(latex_code: str, output_name: str = "rag_output"):
         raise RuntimeError("LaTeX compilation failed:\n" + e.stderr.decode())
 
     return pdf_path
+
+
+def copy_pdf(pdf_path, output_name: str) -> Path:
+    """Copy an already-built PDF (and its .tex) to output/<output_name>.pdf."""
+    src = Path(pdf_path)
+    dest = pdf_output_path(output_name)
+    if src.resolve() == dest.resolve():
+        return dest
+
+    dest.parent.mkdir(exist_ok=True)
+    shutil.copyfile(src, dest)
+    if src.with_suffix(".tex").exists():
+        shutil.copyfile(src.with_suffix(".tex"), dest.with_suffix(".tex"))
+    return dest
+
+
+def compile_pdf_job(latex_code: str, output_name: str):
+    """compile_pdf() for process pools: returns (pdf path as str, seconds taken)."""
+    start = time.perf_counter()
+    pdf_path = compile_pdf(latex_code, output_name)
+    return str(pdf_path), time.perf_counter() - start
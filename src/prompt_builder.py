@@ -44,11 +44,14 @@ def _build_context_snippets(chunks: List[Dict], max_chunks: int = 10, max_chars:
     return "\n\n".join(rows)
 
 
-def build_prompt(query: str, chunks: List[Dict], mode: str = "auto") -> Tuple[str, str]:
+def resolve_style(query: str, chunks: List[Dict], mode: str = "auto") -> str:
     if mode == "auto":
-        style = _infer_style(query, chunks)
-    else:
-        style = mode
+        return _infer_style(query, chunks)
+    return mode
+
+
+def build_prompt(query: str, chunks: List[Dict], mode: str = "auto") -> Tuple[str, str]:
+    style = resolve_style(query, chunks, mode)
 
     context = _build_context_snippets(chunks)
 
@@ -1,33 +1,212 @@
 import faiss
 import numpy as np
 import json
+import threading
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 
-from .config import INDEX_DIR
+from .config import INDEX_RELOAD_INTERVAL
+from .index_store import (
+    current_generation,
+    generation_paths,
+    acquire_lease,
+    release_lease,
+    prune_generations,
+)
+
+
+class _Generation:
+    """One loaded index generation (FAISS index + metadata) plus its reader lease."""
+
+    def __init__(self, gen_dir):
+        self.gen_dir = gen_dir
+        self.lease = acquire_lease(gen_dir)
+        try:
+            index_path, metadata_path = generation_paths(gen_dir)
+            self.index_path = index_path
+            self.index = faiss.read_index(str(index_path))
+            # Metadata is a LIST, not dict
+            self.metadata = json.loads(Path(metadata_path).read_text())
+        except BaseException:
+            release_lease(self.lease)
+            raise
+
+        # In-flight queries on this generation; guarded by Retriever._lock
+        self.active = 0
+        self.retired = False
+
+    @property
+    def name(self):
+        return self.gen_dir.name if self.gen_dir is not None else None
 
 
 class Retriever:
-    def __init__(self):
-        # Load FAISS index
-        self.index_path = INDEX_DIR / "rag.index"
-        self.index = faiss.read_index(str(self.index_path))
+    def __init__(self, watch=True, reload_interval=INDEX_RELOAD_INTERVAL):
+        self._lock = threading.Lock()
 
-        # Load metadata (LIST, not dict)
-        metadata_path = INDEX_DIR / "metadata.json"
-        self.metadata = json.loads(Path(metadata_path).read_text())
+        # Load FAISS index + metadata from the live generation
+        self._generation = self._load_current()
 
         # Embedding model
         self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
-    def retrieve(self, query, k=5):
-        query_emb = self.model.encode([query]).astype(np.float32)
-        D, I = self.index.search(query_emb, k)
+        # Background watcher: picks up generations published by build_index()
+        # and deletes retired ones (never on the query path)
+        self._stop = threading.Event()
+        self._prune_pending = threading.Event()
+        self._watcher = None
+        if watch and reload_interval > 0:
+            self._watcher = threading.Thread(
+                target=self._watch,
+                args=(reload_interval,),
+                name="retriever-index-watcher",
+                daemon=True,
+            )
+            self._watcher.start()
+
+    # ---------- Current generation accessors ----------
+
+    @property
+    def index(self):
+        return self._generation.index
+
+    @property
+    def metadata(self):
+        return self._generation.metadata
 
-        results = []
-        for idx in I[0]:
-            if idx == -1:
-                continue
-            results.append(self.metadata[idx])   # INTEGER index
+    @property
+    def index_path(self):
+        return self._generation.index_path
+
+    @property
+    def generation(self):
+        return self._generation.name
+
+    # ---------- Queries ----------
+
+    def embed(self, query):
+        return self.model.encode([query]).astype(np.float32)
+
+    def embed_batch(self, queries):
+        return self.model.encode(list(queries), batch_size=32).astype(np.float32)
+
+    def retrieve(self, query, k=5, query_emb=None):
+        if query_emb is None:
+            query_emb = self.embed(query)
+
+        # Pin one generation for the whole query so a concurrent swap
+        # can't mix the old index with the new metadata.
+        gen = self._acquire()
+        try:
+            D, I = gen.index.search(query_emb, k)
+
+            results = []
+            for idx in I[0]:
+                if idx == -1:
+                    continue
+                results.append(gen.metadata[idx])   # INTEGER index
+        finally:
+            self._release(gen)
 
         return results
+
+    def retrieve_batch(self, queries, k=5, query_embs=None):
+        """Retrieve for many queries with one encode + one FAISS search."""
+        if query_embs is None:
+            query_embs = self.embed_batch(queries)
+
+        gen = self._acquire()
+        try:
+            D, I = gen.index.search(query_embs, k)
+
+            results = []
+            for row in I:
+                results.append([gen.metadata[idx] for idx in row if idx != -1])
+        finally:
+            self._release(gen)
+
+        return results
+
+    # ---------- Hot reload ----------
+
+    def reload(self):
+        """
+        Swap in the generation CURRENT points at, if it changed.
+        Loading happens outside the lock, so queries keep running against
+        the old generation until the swap. Returns True if swapped.
+        """
+        gen_dir = current_generation()
+        if gen_dir is None or gen_dir.name == self.generation:
+            return False
+
+        new_gen = self._load_current()
+        with self._lock:
+            old = self._generation
+            if new_gen.name == old.name:
+                # Raced with another reload(); keep what we have
+                old, swapped = new_gen, False
+            else:
+                self._generation = new_gen
+                old.retired = True
+                swapped = True
+            # If queries are still in flight, the last one retires `old`
+            finish = not swapped or old.active == 0
+
+        if finish:
+            self._finish_retirement(old)
+        if swapped:
+            print(f"[retriever] Loaded index generation {new_gen.name}")
+        return swapped
+
+    def close(self):
+        """Stop the watcher and drop this process's lease on the live generation."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        release_lease(self._generation.lease)
+        self._prune_if_pending()
+
+    def _load_current(self, attempts=3):
+        # A rebuild can publish (and prune our pick) between reading CURRENT
+        # and opening the files; just re-resolve and try again.
+        for attempt in range(attempts):
+            gen_dir = current_generation()
+            try:
+                return _Generation(gen_dir)
+            except (FileNotFoundError, RuntimeError):
+                if gen_dir is None or attempt == attempts - 1:
+                    raise
+
+    def _acquire(self):
+        with self._lock:
+            gen = self._generation
+            gen.active += 1
+        return gen
+
+    def _release(self, gen):
+        with self._lock:
+            gen.active -= 1
+            done = gen.retired and gen.active == 0
+        if done:
+            self._finish_retirement(gen)
+
+    def _finish_retirement(self, gen):
+        # May run on a query thread: only drop the lease here and leave the
+        # rmtree of old generations to the watcher.
+        release_lease(gen.lease)
+        gen.lease = None
+        self._prune_pending.set()
+
+    def _prune_if_pending(self):
+        if self._prune_pending.is_set():
+            self._prune_pending.clear()
+            prune_generations()
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+                self._prune_if_pending()
+            except Exception as e:
+                print(f"[retriever] Index reload failed: {e}")
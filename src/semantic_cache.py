@@ -0,0 +1,182 @@
+"""
+Semantic answer cache for near-duplicate questions.
+
+Past query embeddings (from the same MiniLM model the Retriever uses) live
+in a small FAISS inner-product index. A new query is a hit when:
+
+  * cosine similarity to a cached query >= the threshold for its mode,
+  * it was asked in the same mode / prompt style,
+  * both queries mention the same numbers ("week 3" vs "week 4" or
+    "5 problems" vs "three" barely move the embedding), and
+  * retrieval returned exactly the same chunk set (so a rebuilt index or a
+    different context never serves a stale answer).
+
+PDF answers are only served while the cached PDF is still the file we
+compiled (a later query with the same output_name overwrites it).
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from .config import SEMANTIC_CACHE_CAPACITY, SEMANTIC_CACHE_THRESHOLDS
+
+_NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "ten": "10", "eleven": "11", "twelve": "12", "fifteen": "15", "twenty": "20",
+}
+_NUMBER_RE = re.compile(r"\d+|[a-z]+")
+
+
+def chunk_signature(chunks: List[Dict[str, Any]]) -> frozenset:
+    """Identity of a retrieved chunk set, stable across index generations."""
+    sig = set()
+    for ch in chunks:
+        h = hashlib.sha1()
+        h.update(str(ch.get("doc_path", "")).encode("utf-8"))
+        h.update(b"\0")
+        h.update((ch.get("text") or "").encode("utf-8"))
+        sig.add(h.hexdigest())
+    return frozenset(sig)
+
+
+def numeric_tokens(query: str) -> tuple:
+    """
+    Numbers mentioned in a query (digits or small number words), as a sorted
+    tuple: "cis320 pset week 3" -> ("3", "320").
+    """
+    nums = []
+    for tok in _NUMBER_RE.findall(query.lower()):
+        if tok.isdigit():
+            nums.append(str(int(tok)))
+        elif tok in _NUMBER_WORDS:
+            nums.append(_NUMBER_WORDS[tok])
+    return tuple(sorted(nums))
+
+
+class SemanticCache:
+    def __init__(self, capacity=SEMANTIC_CACHE_CAPACITY, thresholds=None):
+        self.capacity = capacity
+        # mode -> minimum cosine similarity; "default" covers unlisted modes
+        self.thresholds = dict(SEMANTIC_CACHE_THRESHOLDS)
+        if thresholds:
+            self.thresholds.update(thresholds)
+
+        self._lock = threading.Lock()
+        self._index = None          # built lazily once we know the dim
+        self._entries = OrderedDict()   # id -> entry, in LRU order
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def threshold(self, mode: str) -> float:
+        return self.thresholds.get(mode, self.thresholds["default"])
+
+    # ---------- Lookup / store ----------
+
+    def lookup_entry(self, query: str, query_emb, mode: str, style: str,
+                     chunks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry (answer, pdf_path, ...) for a near-duplicate
+        query, or None.
+        """
+        emb = self._normalize(query_emb)
+        sig = chunk_signature(chunks)
+        nums = numeric_tokens(query)
+        threshold = self.threshold(mode)
+
+        with self._lock:
+            if not self._entries:
+                return None
+
+            k = min(len(self._entries), 8)
+            D, I = self._index.search(emb, k)
+
+            for score, entry_id in zip(D[0], I[0]):
+                if entry_id == -1 or score < threshold:
+                    break   # results are sorted by similarity
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if entry["mode"] != mode or entry["style"] != style or entry["chunks"] != sig:
+                    continue
+                if entry["numbers"] != nums:
+                    continue
+                if not self._pdf_still_valid(entry):
+                    self._evict(int(entry_id))
+                    continue
+
+                self._entries.move_to_end(int(entry_id))
+                return dict(entry)
+
+            return None
+
+    def store(self, query: str, query_emb, mode: str, style: str, chunks: List[Dict[str, Any]],
+              answer: str, pdf_path: Optional[Path] = None) -> None:
+        if self.capacity <= 0:
+            return
+
+        emb = self._normalize(query_emb)
+        entry = {
+            "mode": mode,
+            "style": style,
+            "chunks": chunk_signature(chunks),
+            "numbers": numeric_tokens(query),
+            "answer": answer,
+            "pdf_path": None,
+            "pdf_mtime": None,
+        }
+        if pdf_path is not None:
+            pdf_path = Path(pdf_path)
+            entry["pdf_path"] = pdf_path
+            entry["pdf_mtime"] = pdf_path.stat().st_mtime_ns if pdf_path.exists() else None
+
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(emb.shape[1]))
+
+            while len(self._entries) >= self.capacity:
+                oldest_id = next(iter(self._entries))
+                self._evict(oldest_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(emb, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = entry
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._entries.clear()
+
+    # ---------- Helpers ----------
+
+    def _evict(self, entry_id: int) -> None:
+        # Caller holds self._lock
+        self._entries.pop(entry_id, None)
+        self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+
+    @staticmethod
+    def _normalize(query_emb) -> np.ndarray:
+        emb = np.array(query_emb, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(emb)
+        return emb
+
+    @staticmethod
+    def _pdf_still_valid(entry: Dict[str, Any]) -> bool:
+        pdf_path = entry["pdf_path"]
+        if pdf_path is None:
+            return True
+        try:
+            return pdf_path.stat().st_mtime_ns == entry["pdf_mtime"]
+        except FileNotFoundError:
+            return False
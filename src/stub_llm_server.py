@@ -0,0 +1,129 @@
+"""
+Minimal OpenAI-compatible stub server for exercising batch mode offline.
+
+Answers POST /v1/chat/completions with a small, compilable LaTeX document
+that echoes the query, after an optional artificial latency. Every request
+is logged with its arrival time so concurrency / rate limits can be checked.
+
+Usage:
+    python3 -m src.stub_llm_server --port 8001 --latency 1.0
+    OPENAI_API_KEY=stub python3 run_rag.py --batch jobs.jsonl --out results.jsonl \\
+        --base-url http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_LATEX = r"""\documentclass{article}
+\begin{document}
+\section*{Stub answer}
+%s
+\end{document}
+"""
+
+
+def _latex_escape(text: str) -> str:
+    for ch in "\\{}$&#^_%~":
+        text = text.replace(ch, " ")
+    return text
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_substring = None   # queries containing this get an HTTP 500
+    slow_substring = None   # queries containing this sleep slow_latency instead
+    slow_latency = 0.0
+    started = time.monotonic()
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        user_msg = next(
+            (m["content"] for m in body.get("messages", []) if m.get("role") == "user"),
+            "",
+        )
+        query = user_msg.split("\n\nContext:", 1)[0].removeprefix("Query: ")
+
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            in_flight = cls.in_flight
+            cls.max_in_flight = max(cls.max_in_flight, in_flight)
+        print(f"[stub] t={time.monotonic() - cls.started:7.3f}s in_flight={in_flight} "
+              f"query={query[:60]!r}")
+
+        slow = cls.slow_substring and cls.slow_substring in query
+        time.sleep(cls.slow_latency if slow else cls.latency)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        if cls.fail_substring and cls.fail_substring in query:
+            self.send_error(500, "stub failure")
+            return
+
+        payload = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": STUB_LATEX % _latex_escape(query)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+        data = json.dumps(payload).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request line is printed in do_POST instead
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="seconds to sleep before answering each request")
+    parser.add_argument("--fail-substring", default=None,
+                        help="answer HTTP 500 to queries containing this text")
+    parser.add_argument("--slow-substring", default=None,
+                        help="queries containing this text use --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.fail_substring = args.fail_substring
+    StubHandler.slow_substring = args.slow_substring
+    StubHandler.slow_latency = args.slow_latency
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""No-op PDF compiler for batch tests; kept import-light because the PDF
+process pool re-imports it in every worker."""
+
+
+def fake_compile(latex_code, output_name):
+    return f"output/{output_name}.pdf", 0.0
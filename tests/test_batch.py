@@ -0,0 +1,113 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from openai import OpenAI
+
+from src.batch import run_batch
+from src.generator import RAGEngine
+from src.stub_llm_server import StubHandler
+
+from fake_pdf import fake_compile
+
+
+class FakeRetriever:
+    def embed_batch(self, queries):
+        return np.zeros((len(queries), 4), dtype=np.float32)
+
+    def retrieve_batch(self, queries, k=5, query_embs=None):
+        return [
+            [{"text": f"context for {q}", "doc_type": "pset", "tags": []}] * k
+            for q in queries
+        ]
+
+
+@pytest.fixture
+def stub_rag():
+    class Handler(StubHandler):
+        latency = 0.2
+        fail_substring = "BROKEN"
+        slow_substring = "SLOW"
+        slow_latency = 3.0
+        in_flight = 0
+        max_in_flight = 0
+        lock = threading.Lock()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    rag = RAGEngine.__new__(RAGEngine)
+    rag.client = OpenAI(
+        api_key="stub",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        max_retries=0,
+    )
+    rag.retriever = FakeRetriever()
+    rag.cache = None
+
+    yield rag, Handler
+
+    server.shutdown()
+    server.server_close()
+
+
+def _job(line, query, mode="auto"):
+    return {"line": line, "query": query, "mode": mode, "k": 2, "output_name": f"job_{line}"}
+
+
+def test_run_batch_against_stub_server(stub_rag):
+    rag, handler = stub_rag
+    jobs = [
+        _job(1, "cis320 dp pset week 1", mode="cis320_pset"),
+        _job(2, "explain memoization"),
+        _job(3, "BROKEN query"),
+        _job(4, "cis320 dp pset week 2", mode="cis320_pset"),
+        _job(5, "explain tabulation"),
+        _job(6, "explain knapsack"),
+    ]
+
+    results = run_batch(
+        rag, jobs, concurrency=2, rate_limit_rpm=0, pdf_workers=2, compile_fn=fake_compile
+    )
+
+    # Results come back in input order regardless of completion order
+    assert [r["line"] for r in results] == [1, 2, 3, 4, 5, 6]
+
+    failed = results[2]
+    assert failed["status"] == "error"
+    assert "InternalServerError" in failed["error"]
+    assert failed["answer"] is None
+    assert {"retrieve_batch_s", "total_s", "rate_wait_s"} <= set(failed["timings"])
+
+    ok = [r for i, r in enumerate(results) if i != 2]
+    for res in ok:
+        assert res["status"] == "ok" and res["error"] is None
+        assert {"retrieve_batch_s", "total_s", "rate_wait_s", "llm_s"} <= set(res["timings"])
+
+    for res in (results[0], results[3]):
+        assert res["pdf_path"] == f"output/{res['output_name']}.pdf"
+        assert res["answer"] == f"PDF generated: {res['pdf_path']}"
+        assert "pdf_s" in res["timings"]
+
+    assert "explain memoization" in results[1]["answer"]
+    assert results[1]["pdf_path"] is None
+
+    assert handler.max_in_flight == 2
+
+
+def test_fast_pdf_job_is_not_timed_against_slow_sibling(stub_rag):
+    rag, _ = stub_rag
+    jobs = [
+        _job(1, "SLOW chat question"),
+        _job(2, "cis320 dp pset", mode="cis320_pset"),
+    ]
+
+    slow, fast_pdf = run_batch(
+        rag, jobs, concurrency=2, rate_limit_rpm=0, pdf_workers=1, compile_fn=fake_compile
+    )
+
+    assert slow["status"] == "ok" and fast_pdf["status"] == "ok"
+    assert fast_pdf["pdf_path"] == "output/job_2.pdf"
+    assert fast_pdf["timings"]["total_s"] < slow["timings"]["llm_s"]
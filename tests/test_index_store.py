@@ -0,0 +1,138 @@
+import subprocess
+import sys
+import time
+
+import faiss
+import numpy as np
+import pytest
+
+from src import index_store
+from src import retriever as retriever_mod
+from src.retriever import Retriever
+
+DIM = 4
+
+
+class FakeModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, texts, **kwargs):
+        return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def tmp_index(tmp_path, monkeypatch):
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    monkeypatch.setattr(index_store, "INDEX_DIR", index_dir)
+    monkeypatch.setattr(index_store, "INDEX_PATH", index_dir / "rag.index")
+    monkeypatch.setattr(index_store, "METADATA_PATH", index_dir / "metadata.json")
+    monkeypatch.setattr(index_store, "GENERATIONS_DIR", index_dir / "generations")
+    monkeypatch.setattr(index_store, "CURRENT_POINTER_PATH", index_dir / "CURRENT")
+    monkeypatch.setattr(retriever_mod, "SentenceTransformer", FakeModel)
+    return index_dir
+
+
+def _publish(label):
+    index = faiss.IndexFlatL2(DIM)
+    index.add(np.ones((1, DIM), dtype=np.float32))
+    return index_store.publish_generation(index, [{"id": 0, "text": label}])
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_publish_writes_generation_and_current(tmp_index):
+    gen_dir = _publish("v1")
+
+    assert (tmp_index / "CURRENT").read_text().strip() == gen_dir.name
+    assert index_store.current_generation() == gen_dir
+    assert (gen_dir / "rag.index").exists()
+    assert (gen_dir / "metadata.json").exists()
+    # No temp dirs or pointer temp files left behind
+    assert [p.name for p in (tmp_index / "generations").iterdir()] == [gen_dir.name]
+    assert sorted(p.name for p in tmp_index.iterdir()) == ["CURRENT", "generations"]
+
+
+def test_reload_swaps_pinned_generation_and_prunes_after_release():
+    g1 = _publish("v1")
+    r = Retriever(watch=False)
+    assert r.retrieve("q", k=1) == [{"id": 0, "text": "v1"}]
+
+    # A query is in flight on g1 while a rebuild publishes g2
+    pinned = r._acquire()
+    g2 = _publish("v2")
+
+    # The builder's prune must keep g1: this process still leases it
+    assert index_store.prune_generations() == []
+    assert g1.exists()
+
+    assert r.reload() is True
+    assert r.generation == g2.name
+    assert r.retrieve("q", k=1) == [{"id": 0, "text": "v2"}]
+
+    # The pinned query still sees g1's data, and g1 survives the swap
+    assert pinned.metadata == [{"id": 0, "text": "v1"}]
+    assert g1.exists()
+
+    # Releasing only drops the lease; deletion is left to the watcher
+    r._release(pinned)
+    assert pinned.lease is None
+    assert g1.exists()
+
+    r._prune_if_pending()
+    assert not g1.exists()
+    assert g2.exists()
+    r.close()
+
+
+def test_reload_without_readers_is_noop_when_current_unchanged():
+    _publish("v1")
+    r = Retriever(watch=False)
+    assert r.reload() is False
+    r.close()
+
+
+def test_watcher_picks_up_new_generation_and_prunes_old():
+    g1 = _publish("v1")
+    r = Retriever(reload_interval=0.05)
+    g2 = _publish("v2")
+
+    deadline = time.monotonic() + 5
+    while (r.generation != g2.name or g1.exists()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert r.generation == g2.name
+    assert not g1.exists()
+    r.close()
+
+
+def test_prune_keeps_live_leases_and_drops_stale_ones():
+    g_live = _publish("live")
+    g_stale = _publish("stale")
+    _publish("current")
+
+    index_store.acquire_lease(g_live)
+    stale_readers = g_stale / index_store.READERS_DIRNAME
+    stale_readers.mkdir()
+    (stale_readers / f"{_dead_pid()}-deadbeef").touch()
+
+    removed = index_store.prune_generations()
+
+    assert removed == [g_stale]
+    assert g_live.exists()
+    assert not g_stale.exists()
+
+
+def test_release_lease_lets_prune_delete_generation():
+    g1 = _publish("v1")
+    lease = index_store.acquire_lease(g1)
+    _publish("v2")
+
+    assert index_store.prune_generations() == []
+    index_store.release_lease(lease)
+    assert index_store.prune_generations() == [g1]
@@ -0,0 +1,125 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from src.generator import RAGEngine
+from src.semantic_cache import SemanticCache, numeric_tokens
+
+CHUNKS = [{"doc_path": "cis320_hw.tex", "text": "dynamic programming"}]
+OTHER_CHUNKS = [{"doc_path": "cis320_hw.tex", "text": "greedy algorithms"}]
+
+
+def _emb(cos):
+    """Unit vector at cosine `cos` from e1."""
+    return np.array([[cos, math.sqrt(1 - cos * cos), 0.0, 0.0]], dtype=np.float32)
+
+
+@pytest.fixture
+def cache():
+    c = SemanticCache(capacity=8, thresholds={"default": 0.92, "cis320_pset": 0.90})
+    c.store("cis320 dp pset", _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS, "answer-a")
+    return c
+
+
+def test_hit_above_threshold_and_miss_below(cache):
+    hit = cache.lookup_entry("cis320 dp problems", _emb(0.95), "cis320_pset", "cis320_pset", CHUNKS)
+    assert hit["answer"] == "answer-a"
+
+    assert cache.lookup_entry(
+        "cis320 dp problems", _emb(0.85), "cis320_pset", "cis320_pset", CHUNKS
+    ) is None
+
+
+def test_thresholds_are_per_mode(cache):
+    cache.store("explain dp", _emb(1.0), "auto", "generic", CHUNKS, "answer-auto")
+
+    # 0.91 clears cis320_pset (0.90) but not the default (0.92) used for auto
+    assert cache.lookup_entry("cis320 dp problems", _emb(0.91), "cis320_pset", "cis320_pset", CHUNKS)
+    assert cache.lookup_entry("explain dp", _emb(0.91), "auto", "generic", CHUNKS) is None
+
+
+def test_mode_style_and_chunk_mismatch_miss(cache):
+    q, emb = "cis320 dp pset", _emb(1.0)
+    assert cache.lookup_entry(q, emb, "pdf", "cis320_pset", CHUNKS) is None
+    assert cache.lookup_entry(q, emb, "cis320_pset", "cis320_notes", CHUNKS) is None
+    assert cache.lookup_entry(q, emb, "cis320_pset", "cis320_pset", OTHER_CHUNKS) is None
+
+
+def test_numbers_in_query_must_match(cache):
+    cache.store("cis320 dp pset week 3", _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS, "week3")
+    cache.store("cis320 pset with 5 problems", _emb(1.0), "cis320_pset", "cis320_pset",
+                CHUNKS, "five")
+
+    def lookup(q):
+        entry = cache.lookup_entry(q, _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS)
+        return entry and entry["answer"]
+
+    assert lookup("CIS320 DP pset for week 3") == "week3"
+    assert lookup("cis320 dp pset week 4") is None
+    assert lookup("cis320 pset with five problems") == "five"
+    assert lookup("cis320 pset with 7 problems") is None
+
+
+def test_numeric_tokens():
+    assert numeric_tokens("CIS 320 pset week 03, three problems") == ("3", "3", "320")
+    assert numeric_tokens("explain memoization") == ()
+
+
+def test_lru_eviction_at_capacity():
+    cache = SemanticCache(capacity=2)
+    embs = {name: np.eye(4, dtype=np.float32)[[i]] for i, name in enumerate("abc")}
+
+    def lookup(name):
+        entry = cache.lookup_entry(name, embs[name], "auto", "generic", CHUNKS)
+        return entry and entry["answer"]
+
+    cache.store("a", embs["a"], "auto", "generic", CHUNKS, "A")
+    cache.store("b", embs["b"], "auto", "generic", CHUNKS, "B")
+    assert lookup("a") == "A"     # a is now most recently used
+
+    cache.store("c", embs["c"], "auto", "generic", CHUNKS, "C")
+
+    assert len(cache) == 2
+    assert lookup("b") is None
+    assert lookup("a") == "A"
+    assert lookup("c") == "C"
+
+
+def test_pdf_entry_invalidated_when_file_changes(tmp_path):
+    pdf = tmp_path / "dp.pdf"
+    pdf.write_bytes(b"%PDF-1")
+    cache = SemanticCache()
+    cache.store("cis320 dp pset", _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS,
+                f"PDF generated: {pdf}", pdf_path=pdf)
+
+    assert cache.lookup_entry("cis320 dp pset", _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS)
+
+    # A later compile with the same output_name overwrites the file
+    st = pdf.stat()
+    os.utime(pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert cache.lookup_entry(
+        "cis320 dp pset", _emb(1.0), "cis320_pset", "cis320_pset", CHUNKS
+    ) is None
+    assert len(cache) == 0
+
+
+def test_cached_pdf_hit_writes_requested_output_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "dp_a.pdf").write_bytes(b"%PDF-dp_a")
+
+    rag = RAGEngine.__new__(RAGEngine)
+    rag.cache = SemanticCache()
+
+    emb = np.ones((1, 4), dtype=np.float32)
+    req = rag.prepare("cis320 dp pset", mode="cis320_pset", query_emb=emb, chunks=CHUNKS)
+    rag.finish(req, "\\documentclass{article}", "dp_a", pdf_path="output/dp_a.pdf")
+
+    answer, pdf_path = rag.cached_answer(req, "dp_b")
+
+    assert str(pdf_path) == "output/dp_b.pdf"
+    assert answer == "PDF generated: output/dp_b.pdf"
+    assert (tmp_path / "output" / "dp_b.pdf").read_bytes() == b"%PDF-dp_a"